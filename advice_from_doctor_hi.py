@@ -2,10 +2,13 @@
 Extracts medical advice from doctor's utterances.
 Identifies advisory language patterns in Hindi medical consultations.
 """
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from transcript_hi import split_transcript
 
 # Keywords that indicate medical advice/instructions
-ADVICE_CUES = [
+ADVICE_CUES: Tuple[str, ...] = (
     # Medication / actions
     "लें", "ले", "लेनी", "लेते",
     "करें", "करे", "करना",
@@ -25,28 +28,53 @@ ADVICE_CUES = [
 
     # Follow-up
     "फिर आ", "दिखा", "मिलें"
-]
+)
+
+# All cues as one alternation: a single scan per utterance, stops at first hit
+_ADVICE_CUES_RE = re.compile("|".join(re.escape(c) for c in ADVICE_CUES))
+
+def extract_doctor_advice(
+    transcript: List[Dict[str, str]],
+    diagnosis_lines: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Extract doctor's advice/instructions (unique, in order of first occurrence).
+
+    Pass `diagnosis_lines` when the caller has already run
+    extract_doctor_diagnosis on the same transcript, to avoid running it twice.
+    """
+    speakers, texts = split_transcript(transcript)
+    return extract_doctor_advice_soa(speakers, texts, diagnosis_lines)
+
 
-def extract_doctor_advice(transcript: List[Dict[str, str]]) -> List[str]:
-    """Extract doctor's advice/instructions."""
+def extract_doctor_advice_soa(
+    speakers: List[str],
+    texts: List[str],
+    diagnosis_lines: Optional[Iterable[str]] = None
+) -> List[str]:
+    """Same as extract_doctor_advice, for transcripts held as parallel lists."""
     advice = []
+    seen = set()
     
     # First get diagnosis to avoid duplication
-    from diagnosis_from_doctor_hi import extract_doctor_diagnosis
-    diagnosis_lines = set(extract_doctor_diagnosis(transcript))
+    if diagnosis_lines is None:
+        from diagnosis_from_doctor_hi import extract_doctor_diagnosis_soa
+        diagnosis_lines = extract_doctor_diagnosis_soa(speakers, texts)
+    diagnosis_lines = set(diagnosis_lines)
     
-    for entry in transcript:
-        if entry.get("speaker") != "doctor":
+    for speaker, text in zip(speakers, texts):
+        if speaker != "doctor":
             continue
         
-        text = entry.get("text", "").strip()
+        text = text.strip()
         
         # Skip if this was already captured as diagnosis
         if text in diagnosis_lines:
             continue
         
         # Rest of your existing advice extraction logic...
-        if any(cue in text for cue in ADVICE_CUES):
+        if text not in seen and _ADVICE_CUES_RE.search(text):
+            seen.add(text)
             advice.append(text)
     
     return advice
@@ -3,10 +3,13 @@ Extracts diagnosis from doctor's utterances.
 Identifies diagnostic language patterns in Hindi medical consultations.
 """
 
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Set, Tuple, FrozenSet
+
+from transcript_hi import split_transcript
 
 # Single keywords that indicate diagnostic statements
-DIAGNOSIS_CUES = {
+DIAGNOSIS_CUES: FrozenSet[str] = frozenset({
     "निदान",
     "डायग्नोसिस", 
     "diagnosis",
@@ -16,11 +19,11 @@ DIAGNOSIS_CUES = {
     "समस्या",
     "इन्फेक्शन",
     "infection",
-}
+})
 
 # Multi-word phrases that indicate diagnostic reasoning
 # Format: tuple of words that must ALL be present in the sentence
-DIAGNOSIS_PHRASES = [
+DIAGNOSIS_PHRASES: Tuple[Tuple[str, ...], ...] = (
     # Case-style
     ("केस", "है"),              # okay: "यह बुखार का केस है"
     ("केस", "लग"),             # "यह इन्फेक्शन का केस लग रहा है"
@@ -38,7 +41,29 @@ DIAGNOSIS_PHRASES = [
     # Probabilistic (still usually diagnostic)
     ("हो", "सकता", "है"),      # "वायरल इन्फेक्शन हो सकता है"
     ("लगता", "है"),            # use with caution
-]
+)
+
+# Precompiled matcher: one scan for all single cues
+_DIAG_CUES_RE = re.compile("|".join(re.escape(c) for c in DIAGNOSIS_CUES))
+
+# Every word used by DIAGNOSIS_PHRASES, for incremental buffer tracking
+_PHRASE_WORDS = frozenset(w for phrase in DIAGNOSIS_PHRASES for w in phrase)
+
+
+def _phrase_words_in(text: str) -> Set[str]:
+    """Words of DIAGNOSIS_PHRASES that occur in text."""
+    return {w for w in _PHRASE_WORDS if w in text}
+
+
+def _is_diagnosis_signal(text: str, phrase_words: Set[str]) -> bool:
+    """
+    Diagnosis rule shared by contains_diagnosis_signal and the extractor:
+    a single-word cue in `text`, or all words of some phrase among
+    `phrase_words` (which may also cover earlier utterances).
+    """
+    if _DIAG_CUES_RE.search(text):
+        return True
+    return any(phrase_words.issuperset(phrase) for phrase in DIAGNOSIS_PHRASES)
 
 
 def contains_diagnosis_signal(text: str) -> bool:
@@ -49,16 +74,7 @@ def contains_diagnosis_signal(text: str) -> bool:
     1. Any single-word diagnostic cue is present, OR
     2. All words from any multi-word phrase are present
     """
-    # Check single-word cues
-    if any(cue in text for cue in DIAGNOSIS_CUES):
-        return True
-
-    # Check multi-word phrases (all words must be present)
-    for phrase_words in DIAGNOSIS_PHRASES:
-        if all(word in text for word in phrase_words):
-            return True
-
-    return False
+    return _is_diagnosis_signal(text, _phrase_words_in(text))
 
 def extract_doctor_diagnosis(entries: List[Dict[str, str]]) -> List[str]:
     """
@@ -67,13 +83,14 @@ def extract_doctor_diagnosis(entries: List[Dict[str, str]]) -> List[str]:
     Strategy: 
     1. Accumulate doctor's consecutive sentences into a buffer
     2. When diagnostic keywords appear, capture the full buffer as one diagnosis
+       (only each new sentence is scanned; matches seen so far are carried)
     3. Reset buffer when patient speaks (context boundary)
 
     Args:
         entries: List of transcript entries with "speaker" and "text" keys
 
     Returns:
-        List of diagnosis strings
+        List of unique diagnosis strings, in order of first occurrence
 
     Examples:
         >>> entries = [
@@ -83,22 +100,40 @@ def extract_doctor_diagnosis(entries: List[Dict[str, str]]) -> List[str]:
         >>> extract_doctor_diagnosis(entries)
         ['यह बुखार का केस है', 'आपको वायरल इन्फेक्शन हुआ है']
     """
+    speakers, texts = split_transcript(entries)
+    return extract_doctor_diagnosis_soa(speakers, texts)
+
+
+def extract_doctor_diagnosis_soa(speakers: List[str], texts: List[str]) -> List[str]:
+    """Same as extract_doctor_diagnosis, for transcripts held as parallel lists."""
     diagnoses: List[str] = []
-    buffer = ""
+    seen_diagnoses: Set[str] = set()
+    parts: List[str] = []
+    seen_words: Set[str] = set()
 
-    for entry in entries:
+    for speaker, text in zip(speakers, texts):
         # Reset buffer when patient speaks (context boundary)
-        if entry.get("speaker") != "doctor":
-            buffer = ""
+        if speaker != "doctor":
+            parts.clear()
+            seen_words.clear()
             continue
 
         # Accumulate doctor's consecutive sentences
-        text = entry.get("text", "").strip()
-        buffer = f"{buffer} {text}".strip()
-
-        # Check if diagnostic signal appears
-        if contains_diagnosis_signal(buffer):
-            diagnoses.append(buffer)
-            buffer = ""  # Reset after capturing diagnosis
+        text = text.strip()
+        if not text:
+            continue
+        parts.append(text)
+
+        # Check if diagnostic signal appears. Cues and phrase words contain
+        # no spaces, so none can straddle the " " joining two utterances:
+        # scanning only the new text is equivalent to rescanning the buffer.
+        seen_words |= _phrase_words_in(text)
+        if _is_diagnosis_signal(text, seen_words):
+            diagnosis = " ".join(parts)
+            if diagnosis not in seen_diagnoses:
+                seen_diagnoses.add(diagnosis)
+                diagnoses.append(diagnosis)
+            parts.clear()  # Reset after capturing diagnosis
+            seen_words.clear()
 
     return diagnoses
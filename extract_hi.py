@@ -4,7 +4,7 @@ Handles symptoms, locations, durations, medications, and negations.
 """
 
 import re
-from typing import List, Dict, Set, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator
 from typing import Optional
 
 from medical_vocab_hi import (
@@ -68,7 +68,112 @@ HINDI_NUMBER_WORDS = {
     "नब्बे": 90
 }
 
-DURATION_PATTERNS_COMPILED = [re.compile(p) for p in DURATION_PATTERNS]
+# All duration patterns as one alternation, one capturing group per pattern
+# so that m.lastindex - 1 is the pattern's position in DURATION_PATTERNS
+# (the patterns themselves must not contain capturing groups)
+DURATION_COMBINED = re.compile("|".join(f"({p})" for p in DURATION_PATTERNS))
+
+
+def find_duration(sentence: str) -> Optional[str]:
+    """
+    Duration phrase matched by the earliest pattern in DURATION_PATTERNS
+    (list order wins over position in the sentence), or None.
+    """
+    best = None
+    pos = 0
+    while True:
+        m = DURATION_COMBINED.search(sentence, pos)
+        if m is None:
+            break
+        # At any start position the alternation prefers the earlier pattern,
+        # so the best pattern is met at its own leftmost match
+        if best is None or m.lastindex < best.lastindex:
+            best = m
+            if m.lastindex == 1:
+                break
+        pos = m.start() + 1
+    return best.group(0) if best else None
+
+# ------------------------------------------------------------------------------
+# Single-pass vocabulary matching
+# ------------------------------------------------------------------------------
+
+def _compile_vocab(
+    vocab: Dict[str, List[str]]
+) -> Tuple["re.Pattern[str]", Dict[str, Tuple[Tuple[str, int], ...]]]:
+    """
+    Compile a canonical -> variants vocabulary into one alternation regex.
+
+    Variants are tried longest-first, so each match is the longest variant
+    starting at that position. The returned table expands a matched variant
+    into every (variant, canonical_id) pair that starts there: the variant
+    itself plus any shorter variants that are its prefixes. Canonical IDs
+    are positions in the vocabulary's key order.
+
+    The regex engine derives the set of possible first characters from the
+    alternation and skips positions that cannot start a variant, so text with
+    no vocabulary hits is rejected without a per-variant scan.
+    """
+    variants = sorted(
+        {v for vs in vocab.values() for v in vs},
+        key=len,
+        reverse=True
+    )
+    pattern = re.compile("|".join(re.escape(v) for v in variants))
+
+    owners: Dict[str, List[int]] = {}
+    for canonical_id, vs in enumerate(vocab.values()):
+        for v in vs:
+            owners.setdefault(v, []).append(canonical_id)
+
+    expansions = {
+        v: tuple(
+            (w, canonical_id)
+            for w in variants
+            if v.startswith(w)
+            for canonical_id in owners[w]
+        )
+        for v in variants
+    }
+
+    return pattern, expansions
+
+
+def _scan_vocab(
+    matcher: Tuple["re.Pattern[str]", Dict[str, Tuple[Tuple[str, int], ...]]],
+    text: str
+) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yield (start, variant, canonical_id) for every vocabulary hit in text.
+
+    Equivalent to testing each variant with `in`, but scans the text once.
+    Resuming one character past each match start keeps overlapping hits.
+    """
+    pattern, expansions = matcher
+    pos = 0
+
+    while True:
+        m = pattern.search(text, pos)
+        if m is None:
+            return
+
+        start = m.start()
+        for variant, canonical_id in expansions[m.group()]:
+            yield start, variant, canonical_id
+
+        pos = start + 1
+
+
+NEGATION_PATTERN = re.compile("|".join(re.escape(n) for n in NEGATIONS))
+
+SYMPTOM_MATCHER = _compile_vocab(SYMPTOMS)
+LOCATION_MATCHER = _compile_vocab(LOCATIONS)
+MEDICATION_MATCHER = _compile_vocab(MEDICATIONS)
+
+# Canonical ID -> canonical name
+SYMPTOM_NAMES = list(SYMPTOMS)
+LOCATION_NAMES = list(LOCATIONS)
+MEDICATION_NAMES = list(MEDICATIONS)
 
 # ------------------------------------------------------------------------------
 # Patient demographics extraction (ADD-ON, non-clinical)
@@ -85,11 +190,13 @@ EN_AGE_PATTERN = re.compile(
 )
 
 HI_NAME_PATTERNS = [
-    r"patient\s+ka\s+naam\s+([^\s]+)",
-    r"मरीज\s+का\s+नाम\s+([^\s]+)",
-    r"मेरा\s+नाम\s+([^\s]+)",
-    r"नाम\s+([^\s]+)\s+है",
-    r"पेशेंट\s+नेम\s+([^\s]+)"
+    re.compile(p, re.UNICODE) for p in [
+        r"patient\s+ka\s+naam\s+([^\s]+)",
+        r"मरीज\s+का\s+नाम\s+([^\s]+)",
+        r"मेरा\s+नाम\s+([^\s]+)",
+        r"नाम\s+([^\s]+)\s+है",
+        r"पेशेंट\s+नेम\s+([^\s]+)"
+    ]
 ]
 
 
@@ -99,33 +206,36 @@ HI_SELF_NAME_PATTERN = re.compile(
 )
 
 AGE_PATTERNS = [
-    r"patient\s+age\s*(?:is\s*)?(\d{1,3})",
-    r"मेरी\s+उम्र\s*(\d{1,3})",
-    r"उम्र\s*(\d{1,3})",
-    r"(\d{1,3})\s*साल"
+    re.compile(p, re.UNICODE) for p in [
+        r"patient\s+age\s*(?:is\s*)?(\d{1,3})",
+        r"मेरी\s+उम्र\s*(\d{1,3})",
+        r"उम्र\s*(\d{1,3})",
+        r"(\d{1,3})\s*साल"
+    ]
 ]
+
+# Spoken Hindi number followed by साल/वर्ष. Longest words first, so that
+# "पैंतीस साल" resolves to 35 rather than the "तीस साल" it contains.
+AGE_WORD_PATTERN = re.compile(
+    "(" + "|".join(
+        re.escape(w) for w in sorted(HINDI_NUMBER_WORDS, key=len, reverse=True)
+    ) + r")\s+(?:साल|वर्ष)"
+)
+
 # Negation detection (pre + post symptom, tight window)
 
-def has_negation(sentence: str, symptom_variants: List[str]) -> bool:
+def has_negation(sentence: str, start: int, end: int) -> bool:
     """
     Detect explicit negation of a symptom within a tight local window
-    BEFORE or AFTER the symptom phrase.
+    BEFORE or AFTER the symptom phrase at sentence[start:end].
     """
 
-    for variant in symptom_variants:
-        if variant not in sentence:
-            continue
+    # Search the windows in place (pos/endpos) rather than slicing them out
+    if NEGATION_PATTERN.search(sentence, max(0, start - 15), start):
+        return True
 
-        idx = sentence.find(variant)
-
-        before = sentence[max(0, idx - 15):idx]
-        after = sentence[idx + len(variant): idx + len(variant) + 15]
-
-        if any(neg in before for neg in NEGATIONS):
-            return True
-
-        if any(neg in after for neg in NEGATIONS):
-            return True
+    if NEGATION_PATTERN.search(sentence, end, end + 15):
+        return True
 
     return False
 
@@ -139,8 +249,14 @@ def extract_symptoms(sentences: List[str]) -> Tuple[List[Dict[str, str]], List[s
     - Standalone duration sentences
     """
 
-    found_positive: Dict[str, Dict[str, str]] = {}
-    found_negative: Set[str] = set()
+    # Parallel arrays indexed by symptom ID; positive_order keeps
+    # first-mention order. Result dicts are only built at the end.
+    n = len(SYMPTOMS)
+    present = bytearray(n)
+    negated = bytearray(n)
+    durations: List[Optional[str]] = [None] * n
+    locations: List[Optional[str]] = [None] * n
+    positive_order: List[int] = []
 
     pending_duration: str | None = None
 
@@ -149,60 +265,69 @@ def extract_symptoms(sentences: List[str]) -> Tuple[List[Dict[str, str]], List[s
         if not sentence:
             continue
 
-        # Capture standalone duration (e.g. "तीन दिन से")
-        for pattern in DURATION_PATTERNS_COMPILED:
-            match = pattern.search(sentence)
-            if match:
-                # Only buffer if this sentence has NO symptom mention
-                if not any(
-                    variant in sentence
-                    for variants in SYMPTOMS.values()
-                    for variant in variants
-                ):
-                    pending_duration = match.group(0)
-                    break
-
-        # Symptom detection
-        for canonical, variants in SYMPTOMS.items():
-            mentioned = any(v in sentence for v in variants)
-
-            if not mentioned:
-                continue
+        # Single scan: (start, end) of the first occurrence of every
+        # symptom variant, grouped by canonical
+        hits: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        for start, variant, sym_id in _scan_vocab(SYMPTOM_MATCHER, sentence):
+            hits.setdefault(sym_id, {}).setdefault(
+                variant, (start, start + len(variant))
+            )
+
+        # Duration is looked up once per sentence and shared by its symptoms
+        sentence_dur = find_duration(sentence)
+
+        if not hits:
+            # Capture standalone duration (e.g. "तीन दिन से")
+            if sentence_dur:
+                pending_duration = sentence_dur
+            continue
+
+        # Location likewise (last one in vocabulary order wins)
+        loc_ids = {c for _, _, c in _scan_vocab(LOCATION_MATCHER, sentence)}
+        sentence_loc = LOCATION_NAMES[max(loc_ids)] if loc_ids else None
+
+        # Symptom detection (vocabulary order, so chief complaint is stable)
+        for sym_id in sorted(hits):
+            spans = hits[sym_id].values()
 
             # Explicit negation → negative symptom
-            if has_negation(sentence, variants):
-                found_negative.add(canonical)
+            if any(has_negation(sentence, start, end) for start, end in spans):
+                negated[sym_id] = 1
                 continue
 
             # Positive symptom
-            symptom_entry = found_positive.get(canonical, {"name": canonical})
+            if not present[sym_id]:
+                present[sym_id] = 1
+                positive_order.append(sym_id)
 
             # Attach pending duration
-            if pending_duration and "duration" not in symptom_entry:
-                symptom_entry["duration"] = pending_duration
+            if pending_duration and durations[sym_id] is None:
+                durations[sym_id] = pending_duration
                 pending_duration = None
 
-            # Extract duration from same sentence
-            for pattern in DURATION_PATTERNS_COMPILED:
-                match = pattern.search(sentence)
-                if match:
-                    symptom_entry["duration"] = match.group(0)
-                    break
+            # Duration and location from same sentence
+            if sentence_dur:
+                durations[sym_id] = sentence_dur
 
-            # Extract location
-            for loc_name, loc_variants in LOCATIONS.items():
-                if any(v in sentence for v in loc_variants):
-                    symptom_entry["location"] = loc_name
+            if sentence_loc:
+                locations[sym_id] = sentence_loc
 
-            found_positive[canonical] = symptom_entry
+    symptoms: List[Dict[str, str]] = []
+    for i in positive_order:
+        symptom_entry = {"name": SYMPTOM_NAMES[i]}
+        if durations[i] is not None:
+            symptom_entry["duration"] = durations[i]
+        if locations[i] is not None:
+            symptom_entry["location"] = locations[i]
+        symptoms.append(symptom_entry)
 
     # Do not list negatives that also appear positively
     negatives = [
-        s for s in found_negative
-        if s not in found_positive
+        SYMPTOM_NAMES[i] for i in range(n)
+        if negated[i] and not present[i]
     ]
 
-    return list(found_positive.values()), negatives
+    return symptoms, negatives
 
 
 # Medication extraction (simple substring matching)
@@ -211,13 +336,9 @@ def extract_medications(text: str) -> List[str]:
     Extract medications using canonical vocab matching.
     """
 
-    medications: List[str] = []
+    found = {c for _, _, c in _scan_vocab(MEDICATION_MATCHER, text)}
 
-    for canonical, variants in MEDICATIONS.items():
-        if any(v in text for v in variants):
-            medications.append(canonical)
-
-    return medications
+    return [MEDICATION_NAMES[i] for i in sorted(found)]
 
 def extract_patient_name(text: str) -> Optional[str]:
     """
@@ -241,7 +362,7 @@ def extract_patient_name(text: str) -> Optional[str]:
 
     # 2. Hindi explicit
     for pat in HI_NAME_PATTERNS:
-        m = re.search(pat, text)
+        m = pat.search(text)
         if m:
             name = m.group(1).strip()
             if len(name) >= 2:
@@ -266,7 +387,7 @@ def extract_patient_age(text: str) -> Optional[int]:
         return None
 
     for pat in AGE_PATTERNS:
-        m = re.search(pat, text)
+        m = pat.search(text)
         if m:
             try:
                 age = int(m.group(1))
@@ -275,9 +396,10 @@ def extract_patient_age(text: str) -> Optional[int]:
             except ValueError:
                 pass
 
-    for word, value in HINDI_NUMBER_WORDS.items():
-        if f"{word} साल" in text or f"{word} वर्ष" in text:
-            if 0 < value < 120:
-                return value
+    m = AGE_WORD_PATTERN.search(text)
+    if m:
+        value = HINDI_NUMBER_WORDS[m.group(1)]
+        if 0 < value < 120:
+            return value
 
     return None
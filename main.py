@@ -1,24 +1,32 @@
 """FastAPI server for real-time Hindi medical transcription via WebSocket. Stable, low-latency streaming ASR with Vosk."""
 import sys
 sys.stdout.reconfigure(encoding="utf-8")
+import asyncio
 import json
 import logging
-from datetime import datetime
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 from uuid import uuid4
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Body
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from vosk import Model, KaldiRecognizer
 from build_report_hi import build_json_hi
 from speaker_hi import SpeakerDetector
-from diagnosis_from_doctor_hi import extract_doctor_diagnosis
-from advice_from_doctor_hi import extract_doctor_advice
-from ollama_formatter import generate_opd_note
+from diagnosis_from_doctor_hi import extract_doctor_diagnosis_soa
+from advice_from_doctor_hi import extract_doctor_advice_soa
+from ollama_formatter import generate_opd_note, generate_opd_note_stream, warm_up_ollama
 from fastapi import HTTPException
 
 MODEL_PATH = "vosk-model-hi-0.22"
 SAMPLE_RATE = 16000
+# Feed Vosk at least 100 ms of PCM16 audio per AcceptWaveform call
+AUDIO_CHUNK_BYTES = SAMPLE_RATE * 2 // 10
+# Minimum seconds between partial results sent to the client
+PARTIAL_INTERVAL = 0.12
 TEMPLATE_PATH = "templates/index.html"
 STATIC_DIR = "static"
 REQUIRED_STRUCTURED_KEYS = {
@@ -33,9 +41,34 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 model = Model(MODEL_PATH)
+# Vosk decoding is blocking C code; run it off the event loop so
+# concurrent sessions decode in parallel
+asr_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+# Idle recognizers kept for reuse by later connections
+recognizer_pool = queue.LifoQueue(
+    maxsize=(os.cpu_count() or 1) * 2
+)
 
 sessions: Dict[str, Dict[str, Any]] = {}
 
+# Same output as WebSocket.send_json, but built once instead of per message
+encode_event = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# (epoch second, formatted HH:MM:SS) of the last timestamp handed out
+_hms_cache = [0, ""]
+
+def now_hms() -> str:
+    """Local time as HH:MM:SS, reformatted only when the second changes"""
+    second = int(time.time())
+    if second != _hms_cache[0]:
+        _hms_cache[0] = second
+        _hms_cache[1] = time.strftime("%H:%M:%S", time.localtime(second))
+    return _hms_cache[1]
+
+async def send_event(ws: WebSocket, event: dict):
+    """Send one JSON event to the client as a text frame"""
+    await ws.send_text(encode_event(event))
+
 def new_recognizer():
     """Create single recognizer with word timestamps enabled"""
     r = KaldiRecognizer(model, SAMPLE_RATE)
@@ -43,11 +76,34 @@ def new_recognizer():
     r.SetPartialWords(False)  # Keep partials clean
     return r
 
+def acquire_recognizer():
+    """Take an idle recognizer from the pool, or create one"""
+    try:
+        return recognizer_pool.get_nowait()
+    except queue.Empty:
+        return new_recognizer()
+
+def release_recognizer(r):
+    """Reset a recognizer and return it to the pool (dropped if full)"""
+    r.Reset()
+    try:
+        recognizer_pool.put_nowait(r)
+    except queue.Full:
+        pass
+
+async def run_asr(fn, *args):
+    """Run a blocking recognizer call on the ASR thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(asr_executor, fn, *args)
+
 def create_session(sid: str):
     sessions[sid] = {
-        "transcript": [],
+        # Transcript as parallel columns, one element per utterance
+        "transcript": {"speaker": [], "text": [], "time": [], "words": []},
         "speaker_detector": SpeakerDetector(),
-        "audio": bytearray()
+        "audio": bytearray(),
+        "last_partial": "",
+        "last_partial_at": 0.0
     }
 
 def cleanup_session(sid: str):
@@ -75,6 +131,10 @@ def validate_structured_payload(structured: dict):
                 detail=f"'{key}' must be a list"
             )
 
+@app.on_event("startup")
+def load_llm():
+    warm_up_ollama()
+
 @app.get("/", response_class=HTMLResponse)
 def index():
     with open(TEMPLATE_PATH, encoding="utf-8") as f:
@@ -85,7 +145,7 @@ async def ws(ws: WebSocket):
     await ws.accept()
     sid = str(uuid4())
     create_session(sid)
-    recognizer = new_recognizer()
+    recognizer = acquire_recognizer()
 
     try:
         while True:
@@ -93,72 +153,107 @@ async def ws(ws: WebSocket):
             sess = sessions[sid]
 
             if "text" in msg and msg["text"] == "stop":
-                patient = "\n".join(t["text"] for t in sess["transcript"] if t["speaker"] == "patient")
-                all_text = "\n".join(t["text"] for t in sess["transcript"])
+                speakers = sess["transcript"]["speaker"]
+                texts = sess["transcript"]["text"]
+                patient = "\n".join(t for t, s in zip(texts, speakers) if s == "patient")
+                all_text = "\n".join(texts)
                 structured = build_json_hi(patient, extra_text_for_meds=all_text)
-                structured["diagnosis"] = extract_doctor_diagnosis(sess["transcript"])
-                structured["advice"] = extract_doctor_advice(sess["transcript"])
+                structured["diagnosis"] = extract_doctor_diagnosis_soa(speakers, texts)
+                structured["advice"] = extract_doctor_advice_soa(
+                    speakers,
+                    texts,
+                    diagnosis_lines=structured["diagnosis"]
+                )
 
-                await ws.send_json({"type": "structured", "data": structured})
+                await send_event(ws, {"type": "structured", "data": structured})
 
-                sess["transcript"].clear()
+                for column in sess["transcript"].values():
+                    column.clear()
 
-                recognizer = new_recognizer()
+                recognizer.Reset()
                 sess["audio"].clear()
+                sess["last_partial"] = ""
+                sess["last_partial_at"] = 0.0
                 sess["speaker_detector"].reset()
                 continue
 
             if "bytes" in msg:
                 data = msg["bytes"]
-                sess["audio"].extend(data)
+                pending = sess["audio"]
+
+                # Coalesce small frames so Vosk is called once per chunk;
+                # full-size frames with nothing pending go straight through
+                if pending or len(data) < AUDIO_CHUNK_BYTES:
+                    pending.extend(data)
+                    if len(pending) < AUDIO_CHUNK_BYTES:
+                        continue
+                    data = bytes(pending)
+                    pending.clear()
 
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
+                if await run_asr(recognizer.AcceptWaveform, data):
+                    result = json.loads(await run_asr(recognizer.Result))
+                    # New utterance: its first partial is sent right away
+                    sess["last_partial"] = ""
+                    sess["last_partial_at"] = 0.0
                     text = result.get("text", "").strip()
 
                     if text:
-                        words = result.get("result", [])
                         speaker = sess["speaker_detector"].detect(text)
+                        timestamp = now_hms()
 
-                        entry = {
-                            "speaker": speaker,
-                            "text": text,
-                            "time": datetime.now().strftime("%H:%M:%S"),
-                            "words": words
-                        }
-
-                        sess["transcript"].append(entry)
+                        transcript = sess["transcript"]
+                        transcript["speaker"].append(speaker)
+                        transcript["text"].append(text)
+                        transcript["time"].append(timestamp)
+                        transcript["words"].append(result.get("result", []))
 
-                        await ws.send_json({
+                        await send_event(ws, {
                             "type": "transcript",
-                            "time": entry["time"],
+                            "time": timestamp,
                             "speaker": speaker,
                             "text": text
                         })
 
-                    sess["audio"].clear()
-
                 else:
-                    partial = json.loads(recognizer.PartialResult())
+                    now = time.monotonic()
+                    if now - sess["last_partial_at"] < PARTIAL_INTERVAL:
+                        continue
+
+                    partial = json.loads(await run_asr(recognizer.PartialResult))
                     partial_text = partial.get("partial", "").strip()
 
-                    if partial_text:
-                        await ws.send_json({
+                    # Skip empty partials and repeats of the last one sent
+                    if partial_text and partial_text != sess["last_partial"]:
+                        sess["last_partial"] = partial_text
+                        sess["last_partial_at"] = now
+                        await send_event(ws, {
                             "type": "partial",
                             "text": partial_text
                         })
 
     except WebSocketDisconnect:
         cleanup_session(sid)
+        release_recognizer(recognizer)
     except Exception:
         logger.exception("WebSocket error")
         cleanup_session(sid)
+        release_recognizer(recognizer)
 
 @app.post("/generate-report")
 def generate_report(structured: dict = Body(...)):
     validate_structured_payload(structured)
     return {"note": generate_opd_note(structured)}
 
+@app.post("/generate-report/stream")
+def generate_report_stream(structured: dict = Body(...)):
+    """Stream the OPD note as newline-delimited JSON events."""
+    validate_structured_payload(structured)
+    events = generate_opd_note_stream(structured)
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+        media_type="application/x-ndjson"
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
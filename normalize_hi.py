@@ -2,12 +2,11 @@
 Text normalization for Hindi medical transcripts.
 Removes non-clinical filler words while preserving medical content.
 """
-from typing import List
+import re
 
 # Filler phrases and words to remove
-# Order matters: check longer phrases first
 DROP_LINES = [
-    "आवाज आ रही है",  # Longer phrases first
+    "आवाज आ रही है",
     "आवाज़ आ रही है",
     "हेलो",
     "हैलो",
@@ -24,13 +23,31 @@ DROP_LINES = [
 ]
 
 
+# A line made only of filler phrases, whitespace and punctuation.
+# Alternation is longest-first, so "testing" is not read as "test" +
+# leftover "ing".
+_FILLER_ALT = "|".join(
+    re.escape(f) for f in sorted(DROP_LINES, key=len, reverse=True)
+)
+FILLER_LINE_RE = re.compile(r"[\s,.!?]*(?:(?:" + _FILLER_ALT + r")[\s,.!?]*)*")
+
+# Whole-text form for normalize_hi: every empty or filler-only line together
+# with its newline. The mandatory "\n" / end-of-text after each match means a
+# match only ever consumes complete filler lines.
+DROP_LINE_RE = re.compile(
+    r"^(?:" + FILLER_LINE_RE.pattern + r")(?:\n|\Z)",
+    re.MULTILINE
+)
+
+
 def is_filler_line(line: str) -> bool:
     """
     Check if line is pure filler (should be removed).
     
     Strategy:
-        1. Check if entire line matches a filler phrase exactly
-        2. Check if line is composed entirely of filler words
+        A single precompiled regex must match the whole line: only filler
+        phrases, whitespace and punctuation, e.g. "हेलो", "हेलो हेलो" or
+        "हेलो, आवाज आ रही है".
     
     Returns True ONLY if line contains ONLY filler content.
     Important: Don't remove lines with medical content + filler.
@@ -46,27 +63,7 @@ def is_filler_line(line: str) -> bool:
     if not line_stripped:
         return True
     
-    # Check if entire line is a known filler phrase
-    for filler in DROP_LINES:
-        if line_stripped == filler:
-            return True
-        # Also check if line is just repetitions of a filler
-        # e.g., "हेलो हेलो" or "हेलो हेलो हेलो"
-        if line_stripped.replace(filler, "").strip() == "":
-            return True
-    
-    # Check if line contains ONLY filler phrases (multiple phrases combined)
-    # e.g., "हेलो आवाज आ रही है"
-    remaining = line_stripped
-    for filler in DROP_LINES:
-        remaining = remaining.replace(filler, "")
-    
-    # If after removing all fillers, nothing meaningful remains, it's a filler line
-    remaining_cleaned = remaining.strip()
-    if not remaining_cleaned or remaining_cleaned in [",", ".", "!", "?", " "]:
-        return True
-    
-    return False
+    return FILLER_LINE_RE.fullmatch(line_stripped) is not None
 
 
 def normalize_hi(text: str) -> str:
@@ -86,19 +83,6 @@ def normalize_hi(text: str) -> str:
         >>> normalize_hi("हेलो\\nमुझे बुखार है\\nआवाज आ रही है")
         'मुझे बुखार है'
     """
-    lines = text.split("\n")
-    cleaned: List[str] = []
-    
-    for line in lines:
-        normalized_line = line.strip().lower()
-        
-        if not normalized_line:
-            continue
-        
-        # Skip pure filler lines
-        if is_filler_line(normalized_line):
-            continue
-        
-        cleaned.append(normalized_line)
-    
-    return "\n".join(cleaned)
+    # Strip every line (C-level map), then drop filler lines in one pass
+    stripped = "\n".join(map(str.strip, text.lower().split("\n")))
+    return DROP_LINE_RE.sub("", stripped).rstrip("\n")
@@ -8,17 +8,31 @@ Design principles:
 """
 
 import json
+import re
 import requests
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterator, List
 
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = "gemma3:1b"
 OLLAMA_TIMEOUT_SECONDS = 30
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_KEEP_ALIVE = "30m"  # Keep the model loaded between reports
 MAX_JSON_SIZE_BYTES = 50000
 
+# HTTP sessions reuse the keep-alive connection to `ollama serve`. The
+# report endpoints run on FastAPI's threadpool and requests.Session is not
+# guaranteed thread-safe, so each thread gets its own.
+_sessions = threading.local()
+
+def _get_session() -> requests.Session:
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+    return session
+
 SYSTEM_PROMPT = """
 You are a medical scribe. Generate ONLY a factual clinical note from the JSON provided.
 
@@ -48,14 +62,43 @@ FORBIDDEN_PHRASES = [
     "bacterial infection", "differential diagnosis"
 ]
 
-def validate_input(structured_json: Dict[str, Any]) -> None:
-    """Validate input JSON structure and size."""
+# All forbidden phrases as one alternation, matched against lowercased output
+_FORBIDDEN_RE = re.compile(
+    "|".join(re.escape(p.lower()) for p in FORBIDDEN_PHRASES)
+)
+# Matched (lowercased) text -> (position in FORBIDDEN_PHRASES, phrase)
+_FORBIDDEN_INDEX = {
+    p.lower(): (i, p) for i, p in enumerate(FORBIDDEN_PHRASES)
+}
+
+def validate_input(structured_json: Dict[str, Any]) -> str:
+    """
+    Validate input JSON structure and size.
+    Returns the serialized JSON, as it is embedded in the prompt.
+    """
     if not isinstance(structured_json, dict):
         raise ValueError("Input must be a dictionary")
-    json_str = json.dumps(structured_json, ensure_ascii=False)
-    size = len(json_str.encode("utf-8"))
+    # The limit applies to the compact form; the prompt embeds it indented
+    compact = json.dumps(structured_json, ensure_ascii=False)
+    size = len(compact.encode("utf-8"))
     if size > MAX_JSON_SIZE_BYTES:
         raise ValueError("Input JSON too large")
+    return json.dumps(structured_json, ensure_ascii=False, indent=2)
+
+def _generate_payload(prompt: str, stream: bool) -> Dict[str, Any]:
+    """Request body for /api/generate shared by blocking and streaming calls."""
+    return {
+        "model": MODEL_NAME,
+        "system": SYSTEM_PROMPT,  # Fixed across calls; sent in the system slot
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "num_ctx": 2048,  # Fresh context each time
+            "temperature": 0.1,  # Low temperature for factual output
+            "top_p": 0.9,  # Reduce randomness
+        }
+    }
 
 def call_ollama(prompt: str) -> str:
     """
@@ -63,18 +106,9 @@ def call_ollama(prompt: str) -> str:
     Each call gets a fresh context window (no history bleeding).
     """
     try:
-        response = requests.post(
+        response = _get_session().post(
             OLLAMA_API_URL,
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "num_ctx": 2048,  # Fresh context each time
-                    "temperature": 0.1,  # Low temperature for factual output
-                    "top_p": 0.9,  # Reduce randomness
-                }
-            },
+            json=_generate_payload(prompt, stream=False),
             timeout=OLLAMA_TIMEOUT_SECONDS
         )
         response.raise_for_status()
@@ -91,6 +125,59 @@ def call_ollama(prompt: str) -> str:
     except (KeyError, ValueError) as e:
         raise RuntimeError(f"Invalid Ollama response format: {e}")
 
+def stream_ollama(prompt: str) -> Iterator[str]:
+    """
+    Same as call_ollama, but yields response text chunks as Ollama
+    generates them (newline-delimited JSON stream).
+    """
+    try:
+        with _get_session().post(
+            OLLAMA_API_URL,
+            json=_generate_payload(prompt, stream=True),
+            timeout=OLLAMA_TIMEOUT_SECONDS,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama API error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    except requests.exceptions.ConnectionError:
+        raise RuntimeError("Cannot connect to Ollama. Is it running? (ollama serve)")
+    except requests.exceptions.Timeout:
+        raise RuntimeError("Ollama request timed out")
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"Ollama API error: {e}")
+    except ValueError as e:
+        raise RuntimeError(f"Invalid Ollama response format: {e}")
+
+def warm_up_ollama() -> None:
+    """
+    Load the model into Ollama ahead of the first report.
+
+    A request with no prompt only loads the model, so the first real
+    generation does not pay the cold-start cost. Failures are logged and
+    ignored: Ollama may not be running yet.
+    """
+    try:
+        response = _get_session().post(
+            OLLAMA_API_URL,
+            json={"model": MODEL_NAME, "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=OLLAMA_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        logger.info(f"Ollama model {MODEL_NAME} loaded")
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Ollama warm-up failed: {e}")
+
 def validate_llm_output(narrative: str) -> tuple[str, list[str]]:
     """
     Validate LLM output doesn't contain forbidden reasoning phrases.
@@ -99,43 +186,38 @@ def validate_llm_output(narrative: str) -> tuple[str, list[str]]:
     warnings = []
     narrative_lower = narrative.lower()
 
-    for phrase in FORBIDDEN_PHRASES:
-        if phrase.lower() in narrative_lower:
-            warnings.append(f"LLM output contains forbidden phrase: '{phrase}'")
-            logger.warning(f"Hallucination detected: {phrase}")
+    # One pass over the output; resume just past each match start so
+    # overlapping phrases are all seen
+    found = set()
+    pos = 0
+    while True:
+        m = _FORBIDDEN_RE.search(narrative_lower, pos)
+        if m is None:
+            break
+        found.add(m.group())
+        pos = m.start() + 1
+
+    # Report only the hits, in FORBIDDEN_PHRASES order
+    for _, phrase in sorted(_FORBIDDEN_INDEX[hit] for hit in found):
+        warnings.append(f"LLM output contains forbidden phrase: '{phrase}'")
+        logger.warning(f"Hallucination detected: {phrase}")
 
     return narrative, warnings
 
-def generate_opd_note(structured_json: Dict[str, Any]) -> str:
-    """
-    Generate a safe OPD note from structured clinical JSON.
-
-    LLM generates:
-    - Chief Complaint
-    - History of Present Illness
-    - Negative Findings
-    - Assessment
-
-    System appends (deterministic):
-    - Current Medications
-    - Plan (Advice)
-    """
-    validate_input(structured_json)
+NO_DATA_NOTE = "No clinical data recorded in this session."
 
-    # Check if there's any clinical data
+def _has_clinical_data(structured_json: Dict[str, Any]) -> bool:
+    """True if there is anything for the note to report."""
     has_symptoms = bool(structured_json.get("symptoms"))
     has_diagnosis = bool(structured_json.get("diagnosis"))
     has_meds = bool(structured_json.get("medications"))
     has_advice = bool(structured_json.get("advice"))
 
-    if not (has_symptoms or has_diagnosis or has_meds or has_advice):
-        return "No clinical data recorded in this session."
-
-    json_str = json.dumps(structured_json, ensure_ascii=False, indent=2)
-
-    prompt = f"""{SYSTEM_PROMPT}
+    return has_symptoms or has_diagnosis or has_meds or has_advice
 
-INPUT JSON:
+def _build_prompt(json_str: str) -> str:
+    """Per-report prompt; SYSTEM_PROMPT is sent separately."""
+    return f"""INPUT JSON:
 {json_str}
 
 INSTRUCTIONS:
@@ -146,24 +228,21 @@ INSTRUCTIONS:
 - Explain within limits what each thing means.
 """
 
-    try:
-        narrative = call_ollama(prompt).rstrip()
-
-        # Validate output for hallucinations
-        narrative, warnings = validate_llm_output(narrative)
+def _checked_narrative(narrative: str, structured_json: Dict[str, Any]) -> str:
+    """Validate LLM narrative, falling back if it hallucinates too much."""
+    narrative, warnings = validate_llm_output(narrative)
 
-        if warnings:
-            logger.warning(f"LLM output validation warnings: {warnings}")
-            # Use fallback if too many hallucinations detected
-            if len(warnings) >= 2:
-                logger.error("Multiple hallucinations detected, using fallback")
-                narrative = generate_fallback_note(structured_json)
+    if warnings:
+        logger.warning(f"LLM output validation warnings: {warnings}")
+        # Use fallback if too many hallucinations detected
+        if len(warnings) >= 2:
+            logger.error("Multiple hallucinations detected, using fallback")
+            narrative = generate_fallback_note(structured_json)
 
-    except RuntimeError as e:
-        # Log error but return a fallback note instead of crashing
-        logger.error(f"Ollama generation failed: {e}")
-        narrative = generate_fallback_note(structured_json)
+    return narrative
 
+def _assemble_note(narrative: str, structured_json: Dict[str, Any]) -> str:
+    """Append medications and advice deterministically after the narrative."""
     lines = [narrative]
 
     # Append medications deterministically
@@ -182,6 +261,74 @@ INSTRUCTIONS:
 
     return "\n".join(lines)
 
+def generate_opd_note(structured_json: Dict[str, Any]) -> str:
+    """
+    Generate a safe OPD note from structured clinical JSON.
+
+    LLM generates:
+    - Chief Complaint
+    - History of Present Illness
+    - Negative Findings
+    - Assessment
+
+    System appends (deterministic):
+    - Current Medications
+    - Plan (Advice)
+    """
+    json_str = validate_input(structured_json)
+
+    # Check if there's any clinical data
+    if not _has_clinical_data(structured_json):
+        return NO_DATA_NOTE
+
+    try:
+        narrative = call_ollama(_build_prompt(json_str)).rstrip()
+
+        # Validate output for hallucinations
+        narrative = _checked_narrative(narrative, structured_json)
+
+    except RuntimeError as e:
+        # Log error but return a fallback note instead of crashing
+        logger.error(f"Ollama generation failed: {e}")
+        narrative = generate_fallback_note(structured_json)
+
+    return _assemble_note(narrative, structured_json)
+
+def generate_opd_note_stream(structured_json: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """
+    Streaming variant of generate_opd_note.
+
+    Yields {"type": "note_token", "text": ...} events while the LLM
+    narrative is generated, then one {"type": "note", "note": ...} event
+    with the final validated note (which may replace the streamed text
+    with the fallback note). Input is validated before the first event.
+    """
+    json_str = validate_input(structured_json)
+    return _stream_note_events(structured_json, json_str)
+
+def _stream_note_events(
+    structured_json: Dict[str, Any],
+    json_str: str
+) -> Iterator[Dict[str, str]]:
+    if not _has_clinical_data(structured_json):
+        yield {"type": "note", "note": NO_DATA_NOTE}
+        return
+
+    parts: List[str] = []
+    try:
+        for chunk in stream_ollama(_build_prompt(json_str)):
+            parts.append(chunk)
+            yield {"type": "note_token", "text": chunk}
+
+        # Validate the complete output for hallucinations
+        narrative = _checked_narrative("".join(parts).strip(), structured_json)
+
+    except RuntimeError as e:
+        logger.error(f"Ollama generation failed: {e}")
+        narrative = generate_fallback_note(structured_json)
+
+    yield {"type": "note", "note": _assemble_note(narrative, structured_json)}
+
 def generate_fallback_note(structured_json: Dict[str, Any]) -> str:
     """
     Generate a simple note without LLM if Ollama fails.
@@ -5,6 +5,8 @@ Splits on natural sentence boundaries (commas, newlines).
 import re
 from typing import List
 
+SEGMENT_DELIMITERS = re.compile(r"[,\n]")
+
 def segment_hi(text: str) -> List[str]:
-    parts = re.split(r"[,\n]", text)
-    return [p.strip() for p in parts if p.strip()]
+    parts = SEGMENT_DELIMITERS.split(text)
+    return [p for p in map(str.strip, parts) if p]
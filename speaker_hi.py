@@ -2,65 +2,94 @@
 Speaker detection using rule-based keyword matching.
 Class-based to maintain conversation state per session.
 """
-from typing import List
+import re
+import threading
+from functools import lru_cache
+from typing import Optional, Tuple
 
 # Doctor-specific clinical language patterns
-DOCTOR_CUES: List[str] = [
+DOCTOR_CUES: Tuple[str, ...] = (
     "मैं आपकी जांच", "मैं आपकी जाँच", "जाँच कर रहा",
     "दवा", "लेनी है", "लें", "लिख रहा",
     "केस", "निदान", "डायग्नोसिस", "diagnosis", "लगता है"
-]
+)
 
 # Doctor's imperative/advisory language
-DOCTOR_IMPERATIVES: List[str] = [
+DOCTOR_IMPERATIVES: Tuple[str, ...] = (
     "खाएं", "न खाएं", "पीएं", "मत", "परहेज",
     "आराम", "बचें", "लेते रहें", "कम करें", "ज्यादा न"
-]
+)
 
 # Patient-specific symptom/complaint language
-PATIENT_CUES: List[str] = [
+PATIENT_CUES: Tuple[str, ...] = (
     "मुझे", "मेरे", "दर्द", "तकलीफ",
     "हो रहा", "हो रही", "है", "नहीं है", "नहीं हुई"
-]
+)
+
+# One alternation per outcome. Doctor cues and imperatives share a regex:
+# both yield "doctor" and both outrank any patient cue, wherever it appears.
+_DOCTOR_RE = re.compile("|".join(map(re.escape, DOCTOR_CUES + DOCTOR_IMPERATIVES)))
+_PATIENT_RE = re.compile("|".join(map(re.escape, PATIENT_CUES)))
+
+def _classify(text: str) -> Optional[str]:
+    """
+    Speaker implied by a stripped utterance on its own, or None if it is
+    ambiguous.
+    """
+    # Guard
+    if len(text) <= 4:
+        return None
+
+    # Priority 1-2: Strong doctor signals (clinical language) or
+    # medical imperatives (advice/prescription language)
+    if _DOCTOR_RE.search(text):
+        return "doctor"
+
+    # Priority 3: Patient-specific language (complaints, symptoms)
+    if _PATIENT_RE.search(text):
+        return "patient"
+
+    return None
+
+# Only short repeated turns ("हाँ", "ठीक है") are worth memoizing; longer
+# utterances are patient-specific and must not outlive the consultation
+_SHORT_UTTERANCE_LEN = 16
+_classify_short = lru_cache(maxsize=1024)(_classify)
 
 class SpeakerDetector:
+    # One instance per session; no per-instance __dict__ needed
+    __slots__ = ("_last_speaker",)
     
     def __init__(self):
         self._last_speaker: str = "patient"
     
     def detect(self, text: str) -> str:
         text = text.strip()
+        if len(text) <= _SHORT_UTTERANCE_LEN:
+            speaker = _classify_short(text)
+        else:
+            speaker = _classify(text)
 
-        # Guard
-        if len(text) <= 4:
-            return self._last_speaker
-        
-        # Priority 1: Strong doctor signals (clinical language)
-        if any(cue in text for cue in DOCTOR_CUES):
-            self._last_speaker = "doctor"
-            return "doctor"
-        
-        # Priority 2: Medical imperatives (advice/prescription language)
-        if any(cue in text for cue in DOCTOR_IMPERATIVES):
-            self._last_speaker = "doctor"
-            return "doctor"
-        
-        # Priority 3: Patient-specific language (complaints, symptoms)
-        if any(cue in text for cue in PATIENT_CUES):
-            self._last_speaker = "patient"
-            return "patient"
-        
         # Priority 4: Ambiguous → use conversation context
         # (e.g., just "हाँ" or "ठीक है" continues current speaker)
-        return self._last_speaker
-    
+        if speaker is None:
+            return self._last_speaker
+
+        self._last_speaker = speaker
+        return speaker
+
     def reset(self):
         """Reset to default state for new consultation."""
         self._last_speaker = "patient"
 
 # Legacy function for backward compatibility
 # (in case any old code imports this)
-_default_detector = SpeakerDetector()
+# Conversation state is kept per thread, so concurrent callers don't
+# overwrite each other's last speaker
+_default_detectors = threading.local()
 
 def detect_speaker_hi(text: str) -> str:
-    return _default_detector.detect(text)
+    detector = getattr(_default_detectors, "detector", None)
+    if detector is None:
+        detector = _default_detectors.detector = SpeakerDetector()
+    return detector.detect(text)
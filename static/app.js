@@ -75,19 +75,8 @@ async function startRecording() {
         if (data.type === "structured") {
             updateStatus("processing", "Generating report...");
             structuredBox.textContent = JSON.stringify(data.data, null, 2);
-            // Generate OPD note
-            fetch("/generate-report", {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify(data.data)
-            })
-            .then(res => res.json())
-            .then(res => {
-                llmReportBox.textContent = res.note;
-                copyBtn.style.display = "flex";
-                updateStatus("ready", "Report generated");
-            })
-            .catch(err => {
+            // Generate OPD note (streamed as it is written)
+            streamReport(data.data).catch(err => {
                 console.error(err);
                 llmReportBox.textContent = "❌ Failed to generate OPD note.";
                 updateStatus("", "Generation failed");
@@ -136,6 +125,55 @@ function stopRecording() {
     }, 300);
 }
 
+async function streamReport(structured) {
+    const res = await fetch("/generate-report/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(structured)
+    });
+    if (!res.ok) throw new Error(`Report request failed: ${res.status}`);
+
+    llmReportBox.textContent = "";
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let pending = "";
+    let gotNote = false;
+
+    // Newline-delimited JSON: keep any incomplete trailing line for next read
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        pending += decoder.decode(value, { stream: true });
+        const lines = pending.split("\n");
+        pending = lines.pop();
+        lines.filter(Boolean).forEach(line => {
+            if (handleNoteEvent(JSON.parse(line))) gotNote = true;
+        });
+    }
+    pending += decoder.decode();
+    if (pending.trim() && handleNoteEvent(JSON.parse(pending))) gotNote = true;
+
+    // Stream ended early: don't leave unvalidated tokens on screen
+    if (!gotNote) throw new Error("Report stream ended without a note");
+}
+
+function handleNoteEvent(event) {
+    // Returns true once the final validated note has been shown
+    if (event.type === "note_token") {
+        // Live LLM output; replaced by the validated note at the end
+        llmReportBox.textContent += event.text;
+        return false;
+    }
+
+    if (event.type === "note") {
+        llmReportBox.textContent = event.note;
+        copyBtn.style.display = "flex";
+        updateStatus("ready", "Report generated");
+        return true;
+    }
+    return false;
+}
+
 function showPartial(text) {
     // Create or update the partial result element
     if (!partialElement) {
@@ -1,100 +1,219 @@
-"""Test script to verify all fixes work correctly."""
+"""
+Test script to verify all fixes work correctly.
+
+Each check is a plain test_* function, so pytest collects them directly
+(`pytest test_system.py`); running the file as a script executes them in
+order with a report (set TEST_VERBOSE=1 for per-test inputs and outputs).
+"""
 
 from medical_vocab_hi import SYMPTOMS, MEDICATIONS, DURATION_PATTERNS
-from extract_hi import extract_symptoms, extract_medications
+from extract_hi import extract_symptoms, extract_medications, extract_patient_age
 from segment_hi import segment_hi
 from normalize_hi import normalize_hi
 from diagnosis_from_doctor_hi import extract_doctor_diagnosis
+from advice_from_doctor_hi import extract_doctor_advice
+import os
 import re
 
-print("=" * 80)
-print("TESTING FIXES")
-print("=" * 80)
-
-# Test 1: Duration extraction
-test_text_1 = "मुझे परसों से बुखार लग रहा है"
-sentences = segment_hi(test_text_1)
-symptoms, _ = extract_symptoms(sentences)
-print(f"\n✓ Test 1 - Duration extraction:")
-print(f"  Input: {test_text_1}")
-print(f"  Symptoms: {symptoms}")
-assert any("परसों" in s.get("duration", "") for s in symptoms), "Duration not extracted!"
-print("  PASSED ✓")
-
-# Test 2: Hinglish weakness
-test_text_2 = "वीकनेस लगती है"
-sentences = segment_hi(test_text_2)
-symptoms, _ = extract_symptoms(sentences)
-print(f"\n✓ Test 2 - Hinglish 'weakness':")
-print(f"  Input: {test_text_2}")
-print(f"  Symptoms: {symptoms}")
-assert any(s["name"] == "कमजोरी" for s in symptoms), "Weakness not recognized!"
-print("  PASSED ✓")
-
-# Test 3: Medication spelling variant
-test_text_3 = "पेरासिटामोल लें"
-meds = extract_medications(test_text_3)
-print(f"\n✓ Test 3 - Medication spelling:")
-print(f"  Input: {test_text_3}")
-print(f"  Medications: {meds}")
-assert "पैरासिटामोल" in meds, "Medication spelling variant not recognized!"
-print("  PASSED ✓")
-
-# Test 4: Diagnosis extraction
-test_entries = [
-    {"speaker": "doctor", "text": "यह बुखार का"},
-    {"speaker": "doctor", "text": "केस लग रहा है"}
-]
-diagnoses = extract_doctor_diagnosis(test_entries)
-print(f"\n✓ Test 4 - Diagnosis extraction:")
-print(f"  Input: {test_entries}")
-print(f"  Diagnosis: {diagnoses}")
-assert len(diagnoses) > 0, "Diagnosis not extracted!"
-assert "बुखार" in diagnoses[0], "Diagnosis doesn't contain 'बुखार'!"
-print("  PASSED ✓")
-
-# Test 5: Filler removal - Various cases
-print(f"\n✓ Test 5 - Filler removal:")
-
-# 5a: Simple filler line
-test_5a = "हेलो हेलो आवाज आ रही है\nमुझे बुखार है"
-cleaned_5a = normalize_hi(test_5a)
-print(f"  5a) Simple filler:")
-print(f"      Input: {repr(test_5a)}")
-print(f"      Cleaned: {repr(cleaned_5a)}")
-assert "हेलो" not in cleaned_5a, "हेलो not removed!"
-assert "आवाज" not in cleaned_5a, "आवाज not removed!"
-assert "बुखार" in cleaned_5a, "Medical content removed!"
-print(f"      PASSED ✓")
-
-# 5b: Multiple filler lines
-test_5b = "हेलो\nजी\nमुझे सिर दर्द है\nठीक है"
-cleaned_5b = normalize_hi(test_5b)
-print(f"  5b) Multiple fillers:")
-print(f"      Input: {repr(test_5b)}")
-print(f"      Cleaned: {repr(cleaned_5b)}")
-assert "हेलो" not in cleaned_5b and "जी" not in cleaned_5b and "ठीक है" not in cleaned_5b, "Fillers not removed!"
-assert "सिर दर्द" in cleaned_5b, "Medical content removed!"
-print(f"      PASSED ✓")
-
-# 5c: Filler mixed with medical (should keep)
-test_5c = "हाँ मुझे बुखार है"
-cleaned_5c = normalize_hi(test_5c)
-print(f"  5c) Mixed content (should keep line):")
-print(f"      Input: {repr(test_5c)}")
-print(f"      Cleaned: {repr(cleaned_5c)}")
-# Line should be kept because it has medical content
-assert "बुखार" in cleaned_5c, "Medical content removed!"
-print(f"      PASSED ✓")
-
-print("\n" + "=" * 80)
-print("ALL TESTS PASSED! ✓✓✓")
-print("=" * 80)
-print("\nThe system is now ready for production testing.")
-print("Key improvements:")
-print("  1. Duration extraction (परसों से, आज से, etc.)")
-print("  2. Hinglish symptom recognition (वीकनेस, weakness)")
-print("  3. Medication spelling variants (पेरासिटामोल)")
-print("  4. Better diagnosis pattern matching")
-print("  5. Proper filler line removal")
-print("  6. Strengthened LLM prompt to prevent hallucination")
+# Per-test input/output details are printed only with TEST_VERBOSE=1
+VERBOSE = os.environ.get("TEST_VERBOSE") == "1"
+
+
+def test_duration_extraction():
+    # Test 1: Duration extraction
+    test_text_1 = "मुझे परसों से बुखार लग रहा है"
+    sentences = segment_hi(test_text_1)
+    symptoms, _ = extract_symptoms(sentences)
+    if VERBOSE:
+        print(f"\n✓ Test 1 - Duration extraction:")
+        print(f"  Input: {test_text_1}")
+        print(f"  Symptoms: {symptoms}")
+    durations = " ".join(s.get("duration", "") for s in symptoms)
+    assert "परसों" in durations, "Duration not extracted!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_hinglish_weakness():
+    # Test 2: Hinglish weakness
+    test_text_2 = "वीकनेस लगती है"
+    sentences = segment_hi(test_text_2)
+    symptoms, _ = extract_symptoms(sentences)
+    if VERBOSE:
+        print(f"\n✓ Test 2 - Hinglish 'weakness':")
+        print(f"  Input: {test_text_2}")
+        print(f"  Symptoms: {symptoms}")
+    names = {s["name"] for s in symptoms}
+    assert "कमजोरी" in names, "Weakness not recognized!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_medication_spelling():
+    # Test 3: Medication spelling variant
+    test_text_3 = "पेरासिटामोल लें"
+    meds = extract_medications(test_text_3)
+    if VERBOSE:
+        print(f"\n✓ Test 3 - Medication spelling:")
+        print(f"  Input: {test_text_3}")
+        print(f"  Medications: {meds}")
+    assert "पैरासिटामोल" in meds, "Medication spelling variant not recognized!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_diagnosis_extraction():
+    # Test 4: Diagnosis extraction
+    test_entries = [
+        {"speaker": "doctor", "text": "यह बुखार का"},
+        {"speaker": "doctor", "text": "केस लग रहा है"}
+    ]
+    diagnoses = extract_doctor_diagnosis(test_entries)
+    if VERBOSE:
+        print(f"\n✓ Test 4 - Diagnosis extraction:")
+        print(f"  Input: {test_entries}")
+        print(f"  Diagnosis: {diagnoses}")
+    assert len(diagnoses) > 0, "Diagnosis not extracted!"
+    assert "बुखार" in diagnoses[0], "Diagnosis doesn't contain 'बुखार'!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_filler_removal():
+    # Test 5: Filler removal - Various cases
+    if VERBOSE:
+        print(f"\n✓ Test 5 - Filler removal:")
+
+    # 5a: Simple filler line
+    test_5a = "हेलो हेलो आवाज आ रही है\nमुझे बुखार है"
+    cleaned_5a = normalize_hi(test_5a)
+    if VERBOSE:
+        print(f"  5a) Simple filler:")
+        print(f"      Input: {repr(test_5a)}")
+        print(f"      Cleaned: {repr(cleaned_5a)}")
+    assert "हेलो" not in cleaned_5a, "हेलो not removed!"
+    assert "आवाज" not in cleaned_5a, "आवाज not removed!"
+    assert "बुखार" in cleaned_5a, "Medical content removed!"
+    if VERBOSE:
+        print(f"      PASSED ✓")
+
+    # 5b: Multiple filler lines
+    test_5b = "हेलो\nजी\nमुझे सिर दर्द है\nठीक है"
+    cleaned_5b = normalize_hi(test_5b)
+    if VERBOSE:
+        print(f"  5b) Multiple fillers:")
+        print(f"      Input: {repr(test_5b)}")
+        print(f"      Cleaned: {repr(cleaned_5b)}")
+    assert "हेलो" not in cleaned_5b and "जी" not in cleaned_5b and "ठीक है" not in cleaned_5b, "Fillers not removed!"
+    assert "सिर दर्द" in cleaned_5b, "Medical content removed!"
+    if VERBOSE:
+        print(f"      PASSED ✓")
+
+    # 5c: Filler mixed with medical (should keep)
+    test_5c = "हाँ मुझे बुखार है"
+    cleaned_5c = normalize_hi(test_5c)
+    if VERBOSE:
+        print(f"  5c) Mixed content (should keep line):")
+        print(f"      Input: {repr(test_5c)}")
+        print(f"      Cleaned: {repr(cleaned_5c)}")
+    # Line should be kept because it has medical content
+    assert "बुखार" in cleaned_5c, "Medical content removed!"
+    if VERBOSE:
+        print(f"      PASSED ✓")
+
+
+def test_spoken_age():
+    # Test 6: Spoken Hindi age (compound numbers must not match their suffix)
+    test_text_6 = "मेरी उम्र पैंतीस साल है"
+    age = extract_patient_age(test_text_6)
+    if VERBOSE:
+        print(f"\n✓ Test 6 - Spoken age:")
+        print(f"  Input: {test_text_6}")
+        print(f"  Age: {age}")
+    assert age == 35, "Compound Hindi number not recognized!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_advice_dedup():
+    # Test 7: Repeated advice is reported once
+    test_entries_7 = [
+        {"speaker": "doctor", "text": "खूब पानी पीएं"},
+        {"speaker": "patient", "text": "ठीक है"},
+        {"speaker": "doctor", "text": "खूब पानी पीएं"},
+    ]
+    advice = extract_doctor_advice(test_entries_7)
+    if VERBOSE:
+        print(f"\n✓ Test 7 - Advice dedup:")
+        print(f"  Input: {test_entries_7}")
+        print(f"  Advice: {advice}")
+    assert advice == ["खूब पानी पीएं"], "Repeated advice not deduplicated!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_duration_pattern_priority():
+    # Test 8: Two durations in one sentence - DURATION_PATTERNS order wins,
+    # not position ("दिन" patterns come before "हफ्ते")
+    test_text_9 = "2 हफ्ते पहले शुरू हुई कमजोरी 3 दिन से है"
+    symptoms, _ = extract_symptoms(segment_hi(test_text_9))
+    if VERBOSE:
+        print(f"\n✓ Test 8 - Duration pattern priority:")
+        print(f"  Input: {test_text_9}")
+        print(f"  Symptoms: {symptoms}")
+    durations = [s.get("duration") for s in symptoms]
+    assert durations == ["3 दिन"], "Wrong duration picked!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+def test_diagnosis_phrase_across_utterances():
+    # Test 9: Phrase words split over consecutive doctor utterances are
+    # joined; a patient turn in between resets the buffer
+    split_entries = [
+        {"speaker": "doctor", "text": "वायरल बुखार हो"},
+        {"speaker": "doctor", "text": "सकता है"},
+    ]
+    interrupted_entries = [
+        {"speaker": "doctor", "text": "वायरल हो"},
+        {"speaker": "patient", "text": "जी"},
+        {"speaker": "doctor", "text": "सकता है"},
+    ]
+    split = extract_doctor_diagnosis(split_entries)
+    interrupted = extract_doctor_diagnosis(interrupted_entries)
+    if VERBOSE:
+        print(f"\n✓ Test 9 - Diagnosis phrase across utterances:")
+        print(f"  Split: {split}")
+        print(f"  Interrupted: {interrupted}")
+    assert split == ["वायरल बुखार हो सकता है"], "Split phrase not joined!"
+    assert interrupted == [], "Patient turn did not reset the buffer!"
+    if VERBOSE:
+        print("  PASSED ✓")
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print("TESTING FIXES")
+    print("=" * 80)
+
+    test_duration_extraction()
+    test_hinglish_weakness()
+    test_medication_spelling()
+    test_diagnosis_extraction()
+    test_filler_removal()
+    test_spoken_age()
+    test_advice_dedup()
+    test_duration_pattern_priority()
+    test_diagnosis_phrase_across_utterances()
+
+    print("\n" + "=" * 80)
+    print("ALL TESTS PASSED! ✓✓✓")
+    print("=" * 80)
+    print("\nThe system is now ready for production testing.")
+    print("Key improvements:")
+    print("  1. Duration extraction (परसों से, आज से, etc.)")
+    print("  2. Hinglish symptom recognition (वीकनेस, weakness)")
+    print("  3. Medication spelling variants (पेरासिटामोल)")
+    print("  4. Better diagnosis pattern matching")
+    print("  5. Proper filler line removal")
+    print("  6. Strengthened LLM prompt to prevent hallucination")
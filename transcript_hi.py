@@ -0,0 +1,21 @@
+"""
+Transcript layout helpers shared by the doctor-side extractors.
+Converts list-of-dicts transcripts into parallel speaker/text lists.
+"""
+from typing import List, Dict, Tuple
+
+
+def split_transcript(entries: List[Dict[str, str]]) -> Tuple[List[str], List[str]]:
+    """
+    Split transcript entries into parallel (speakers, texts) lists.
+
+    Extractors that loop over the transcript can then iterate
+    zip(speakers, texts) instead of doing two dict lookups per entry.
+
+    Example:
+        >>> split_transcript([{"speaker": "doctor", "text": "आराम करें"}])
+        (['doctor'], ['आराम करें'])
+    """
+    speakers = [entry.get("speaker") for entry in entries]
+    texts = [entry.get("text", "") for entry in entries]
+    return speakers, texts